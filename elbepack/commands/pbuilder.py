@@ -3,7 +3,10 @@
 # SPDX-FileCopyrightText: 2015-2017 Linutronix GmbH
 
 import argparse
+import os
+import shutil
 import subprocess
+import sys
 
 from elbepack.cli import add_argument, add_arguments_from_decorated_function
 from elbepack.commands.preprocess import add_xmlpreprocess_passthrough_arguments
@@ -72,6 +75,23 @@ def _update(control, args):
     print('')
 
 
+def _pack_source(srcdir, archive):
+    # The archive is unpacked in the initvm right after the upload,
+    # so favour speed over compression ratio.
+    if shutil.which('pigz') is not None:
+        compress_program = 'pigz -1'
+    else:
+        compress_program = 'gzip -1'
+
+    subprocess.run(['tar', '-C', srcdir, '-b', '1024',
+                    f'--use-compress-program={compress_program}',
+                    '-cf', archive, '.'],
+                   check=True)
+
+
+@add_argument('--tmpfs', action='store_true', default=os.environ.get('ELBE_TMPFS') == '1',
+              help='pack the sources on /dev/shm instead of the default '
+                   'temporary directory (default if ELBE_TMPFS=1)')
 @add_argument('--origfile', default=[], action='append', help='upload orig file')
 @add_argument('--profile', default='', help='profile that shall be built')
 @add_argument('--skip-download', action='store_true', dest='skip_download', default=False,
@@ -87,7 +107,13 @@ def _update(control, args):
 @add_argument('--xmlfile', help='xmlfile to use')
 @add_argument('--project', help='project directory on the initvm')
 def _build(control, args):
-    tmp = TmpdirFilesystem()
+    tmpdir = None
+    if args.tmpfs:
+        if os.path.isdir('/dev/shm'):
+            tmpdir = '/dev/shm'
+        else:
+            print('/dev/shm does not exist, packing the sources in the default '
+                  'temporary directory', file=sys.stderr)
 
     if args.xmlfile:
         prjdir = control.service.new_project()
@@ -106,24 +132,26 @@ def _build(control, args):
     else:
         args.parser.error('you need to specify --project or --xmlfile option')
 
-    print('')
-    print('Packing Source into tmp archive')
-    print('')
+    # Only keep the source archive around until it is uploaded,
+    # it may be stored in RAM on /dev/shm.
+    with TmpdirFilesystem(dir=tmpdir) as tmp:
+        print('')
+        print('Packing Source into tmp archive')
+        print('')
 
-    subprocess.run(['tar', '-C', args.srcdir, '-czf', tmp.fname('pdebuild.tar.gz'), '.'],
-                   check=True)
+        _pack_source(args.srcdir, tmp.fname('pdebuild.tar.gz'))
+
+        for of in args.origfile:
+            print('')
+            print(f"Pushing orig file '{of}' into pbuilder")
+            print('')
+            control.set_orig(prjdir, of)
 
-    for of in args.origfile:
         print('')
-        print(f"Pushing orig file '{of}' into pbuilder")
+        print('Pushing source into pbuilder')
         print('')
-        control.set_orig(prjdir, of)
-
-    print('')
-    print('Pushing source into pbuilder')
-    print('')
 
-    control.set_pdebuild(prjdir, tmp.fname('pdebuild.tar.gz'), args.profile, args.cross)
+        control.set_pdebuild(prjdir, tmp.fname('pdebuild.tar.gz'), args.profile, args.cross)
 
     for msg in control.wait_busy(prjdir):
         print(msg)
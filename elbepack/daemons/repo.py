@@ -11,6 +11,10 @@ import wsgiref.util
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# Files are streamed in blocks of this size. The FileWrapper default of 8 KiB
+# results in a lot of small reads and writes for image files.
+_BLOCK_SIZE = 1024 * 1024
+
 
 # taken from wsgiref examples
 def _app(environ, respond):
@@ -25,7 +29,7 @@ def _app(environ, respond):
             ('Content-Type', mime_type),
             ('Content-Length', str(os.stat(fn).st_size)),
         ])
-        return wsgiref.util.FileWrapper(open(fn, 'rb'))
+        return wsgiref.util.FileWrapper(open(fn, 'rb'), _BLOCK_SIZE)
     else:
         respond('404 Not Found', [('Content-Type', 'text/plain')])
         return [b'not found']
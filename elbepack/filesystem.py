@@ -424,8 +424,8 @@ class Filesystem:
 
 
 class TmpdirFilesystem (Filesystem):
-    def __init__(self, debug=False):
-        tmpdir = mkdtemp()
+    def __init__(self, debug=False, dir=None):
+        tmpdir = mkdtemp(dir=dir)
         super().__init__(tmpdir)
         self.debug = debug
 
@@ -127,8 +127,11 @@ def do(cmd, /, *, env_add=None, **kwargs):
     >>> cleanup()
     """
 
-    new_env = os.environ.copy()
+    # Without additional variables let the child inherit our environment
+    # instead of passing a copy of it.
+    new_env = None
     if env_add:
+        new_env = os.environ.copy()
         new_env.update(env_add)
 
     run(cmd, shell=_is_shell_cmd(cmd), env=new_env, stdout=ELBE_LOGGING, stderr=subprocess.STDOUT,
@@ -8,13 +8,15 @@ import fnmatch
 import functools
 import logging
 import os
+import re
 import socket
 import sys
 import time
 from http.client import BadStatusLine
-from urllib.error import URLError
-from urllib.request import urlopen, urlretrieve
+from urllib.error import ContentTooShortError, URLError
+from urllib.request import urlopen
 
+from suds.cache import ObjectCache
 from suds.client import Client
 
 from elbepack.cli import CliError
@@ -37,7 +39,40 @@ class ElbeVersionMismatch(RuntimeError):
             raise cls(client_version, server_version)
 
 
+def _wsdl_cache_options():
+    # Cache the processed WSDL objects instead of only the raw documents,
+    # to skip building them on every connection.
+    # The cache contains pickled objects, so keep it in a private per-user
+    # directory. Client and server need to be of the same version, so a
+    # separate cache per client version avoids picking up definitions of
+    # other versions.
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    elbe_cache = os.path.join(cache_home, 'elbe')
+    location = os.path.join(elbe_cache, f'suds-{elbe_version}')
+    try:
+        os.makedirs(elbe_cache, mode=0o700, exist_ok=True)
+        os.makedirs(location, mode=0o700, exist_ok=True)
+    except OSError:
+        # The cache is only an optimization, use the suds default instead.
+        _logger.debug('cannot create WSDL cache in %s', location, exc_info=True)
+        return {}
+
+    return {'cache': ObjectCache(location=location, days=1), 'cachingpolicy': 1}
+
+
 class ElbeSoapClient:
+    # Files are uploaded in chunks of this size, one SOAP call per chunk.
+    # The base64 encoded chunk plus the SOAP envelope has to stay below the
+    # max_content_length of the WsgiApplication in elbepack.daemons.soap,
+    # spyne's default of 2 MiB.
+    UPLOAD_CHUNK_SIZE = 1024 * 1024
+    # Downloaded files are read in chunks of up to this size.
+    DOWNLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+
+    # Bounds of the interval in seconds, in which wait_busy() polls the project.
+    _BUSY_POLL_MIN_DELAY = 0.1
+    _BUSY_POLL_MAX_DELAY = 2.0
+
     def __init__(self, host, port, user, passwd, timeout, retries=10):
 
         # Attributes
@@ -54,17 +89,28 @@ class ElbeSoapClient:
         control = None
         current_retries = 0
 
+        cache_options = _wsdl_cache_options()
+
         # Loop and try to connect
         while control is None:
             current_retries += 1
             try:
-                control = Client(self._wsdl, timeout=self._timeout)
+                client = Client(self._wsdl, timeout=self._timeout, **cache_options)
+                # With a warm cache the client is created without network
+                # access, this is the first call actually reaching the server.
+                server_version = client.service.get_version()
+                control = client
             except (URLError, socket.error, BadStatusLine):
                 if current_retries > self._retries:
                     raise
                 time.sleep(1)
 
-        ElbeVersionMismatch.check(elbe_version, control.service.get_version())
+        try:
+            ElbeVersionMismatch.check(elbe_version, server_version)
+        except ElbeVersionMismatch:
+            # The cached WSDL may belong to the server's previous version.
+            control.options.cache.clear()
+            raise
 
         # We have a Connection, now login
         control.service.login(self._user, self._passwd)
@@ -83,6 +129,25 @@ class ElbeSoapClient:
     def _file_download_url(self, builddir, filename):
         return f'http://{self.host}:{self.port}/repo/{builddir}/{filename}'
 
+    @classmethod
+    def _download_to(cls, url, dst_fname):
+        # Read into a single reused buffer and write it out in large chunks.
+        buf = bytearray(cls.DOWNLOAD_CHUNK_SIZE)
+        view = memoryview(buf)
+
+        with urlopen(url) as r, open(dst_fname, 'wb') as fp:
+            size = int(r.headers.get('Content-Length', -1))
+            read = 0
+            while n := r.readinto(buf):
+                read += n
+                fp.write(view[:n])
+
+        # readinto() does not notice a connection closed early, same check
+        # as done by urlretrieve().
+        if size >= 0 and read < size:
+            raise ContentTooShortError(
+                f'retrieval incomplete: got only {read} out of {size} bytes', None)
+
     def download_file(self, builddir, filename, dst_fname):
         # XXX the retry logic might get removed in the future, if the error
         # doesn't occur in real world. If it occurs, we should think about
@@ -91,41 +156,44 @@ class ElbeSoapClient:
 
         while True:
             try:
-                urlretrieve(self._file_download_url(builddir, filename), dst_fname)
+                self._download_to(self._file_download_url(builddir, filename), dst_fname)
                 return
             except BadStatusLine as e:
                 retry = retry - 1
 
-                print(f'get_file {filename} failed, retry {retry} times',
-                      file=sys.stderr)
-                print(str(e), file=sys.stderr)
-                print(repr(e.line), file=sys.stderr)
+                _logger.warning('get_file %s failed, retry %d times: %s %r',
+                                filename, retry, e, e.line)
 
                 if not retry:
-                    print('file transfer failed', file=sys.stderr)
+                    _logger.error('file transfer failed')
                     sys.exit(170)
 
-    @staticmethod
-    def _upload_file(append, build_dir, filename):
-        size = 1024 * 1024
-
-        with open(filename, 'rb') as f:
-
-            while True:
+    @classmethod
+    def _base64_chunks(cls, fp):
+        # Reuse a single buffer for reading, the SOAP interface needs the
+        # encoded data as str anyway.
+        buf = bytearray(cls.UPLOAD_CHUNK_SIZE)
+        view = memoryview(buf)
 
-                bin_data = f.read(size)
-                data = binascii.b2a_base64(bin_data)
+        while True:
+            n = fp.readinto(buf)
+            if n:
+                yield binascii.b2a_base64(view[:n], newline=False).decode('ascii')
 
-                if not isinstance(data, str):
-                    data = data.decode('ascii')
+            if n != len(buf):
+                break
 
+    @classmethod
+    def _upload_file(cls, append, build_dir, filename):
+        with open(filename, 'rb') as f:
+            for data in cls._base64_chunks(f):
                 append(build_dir, data)
 
-                if len(bin_data) != size:
-                    break
-
     def wait_busy(self, project_dir):
         current_retries = 0
+        # Poll quickly while the project produces output, but back off
+        # during phases without any progress messages.
+        delay = self._BUSY_POLL_MIN_DELAY
         while True:
             current_retries += 1
             try:
@@ -143,9 +211,12 @@ class ElbeSoapClient:
                 continue
 
             if not msg:
-                time.sleep(0.1)
+                time.sleep(delay)
+                delay = min(delay * 1.5, self._BUSY_POLL_MAX_DELAY)
                 continue
 
+            delay = self._BUSY_POLL_MIN_DELAY
+
             if msg == 'ELBE-FINISH':
                 break
 
@@ -167,32 +238,19 @@ class ElbeSoapClient:
         if not x.has('target'):
             raise ValueError("<target> is missing, this file can't be built in an initvm")
 
-        size = 1024 * 1024
         part = 0
         with open(filename, 'rb') as fp:
-            while True:
-
-                xml_base64 = binascii.b2a_base64(fp.read(size))
-
-                if not isinstance(xml_base64, str):
-                    xml_base64 = xml_base64.decode('ascii')
-
-                # finish upload
-                if len(xml_base64) == 1:
-                    part = self.service.upload_file(builddir,
-                                                    'source.xml',
-                                                    xml_base64,
-                                                    -1)
-                else:
-                    part = self.service.upload_file(builddir,
-                                                    'source.xml',
-                                                    xml_base64,
-                                                    part)
+            for xml_base64 in self._base64_chunks(fp):
+                part = self.service.upload_file(builddir,
+                                                'source.xml',
+                                                xml_base64,
+                                                part)
                 if part == -1:
                     raise RuntimeError('project busy, upload not allowed')
-                if part == -2:
-                    _logger.debug('upload of xml finished')
-                    return
+
+        # finish upload
+        self.service.upload_file(builddir, 'source.xml', '', -1)
+        _logger.debug('upload of xml finished')
 
     def set_orig(self, builddir, orig_file):
         self.service.start_upload_orig(builddir, os.path.basename(orig_file))
@@ -212,12 +270,15 @@ class ElbeSoapClient:
     def get_files(self, builddir, outdir, *, pbuilder_only=False, wildcard=None):
         files = self.service.get_files(builddir)
 
+        # fnmatch.fnmatch() would translate the pattern for every file
+        match = re.compile(fnmatch.translate(wildcard)).match if wildcard else None
+
         for f in files[0]:
-            if (pbuilder_only and not f.name.startswith('pbuilder_cross')
-                    and not f.name.startswith('pbuilder')):
+            # This also covers pbuilder_cross
+            if pbuilder_only and not f.name.startswith('pbuilder'):
                 continue
 
-            if wildcard and not fnmatch.fnmatch(f.name, wildcard):
+            if match and not match(f.name):
                 continue
 
             yield f
@@ -230,5 +291,7 @@ class ElbeSoapClient:
 
     def dump_file(self, builddir, file):
         with urlopen(self._file_download_url(builddir, file)) as r:
-            for chunk in r:
+            # Iterating over the response would split binary files at
+            # arbitrary newline bytes, read whatever is available instead.
+            while chunk := r.read1(self.DOWNLOAD_CHUNK_SIZE):
                 yield chunk
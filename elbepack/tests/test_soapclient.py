@@ -0,0 +1,79 @@
+# ELBE - Debian Based Embedded Rootfilesystem Builder
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2024 Linutronix GmbH
+
+import binascii
+import http.server
+import importlib.util
+import os
+import subprocess
+import sys
+import threading
+from urllib.error import ContentTooShortError
+
+import pytest
+
+from elbepack.soapclient import ElbeSoapClient
+
+
+# Generous allowance for the SOAP envelope around an upload chunk.
+_ENVELOPE_SIZE = 64 * 1024
+
+
+def _spyne_max_content_length():
+    """
+    Default max_content_length of spyne's WsgiApplication, as used by the initvm.
+    """
+    if importlib.util.find_spec('spyne') is None:
+        pytest.skip('spyne is not installed')
+
+    # Importing spyne installs a meta path importer which triggers
+    # warnings in later, unrelated imports. Keep it out of this process.
+    return int(subprocess.run([
+        sys.executable, '-W', 'ignore', '-c',
+        'import inspect\n'
+        'from spyne.server.wsgi import WsgiApplication\n'
+        "print(inspect.signature(WsgiApplication).parameters['max_content_length'].default)\n",
+    ], check=True, capture_output=True, text=True).stdout)
+
+
+def test_upload_chunks(tmp_path):
+    max_content_length = _spyne_max_content_length()
+
+    data = os.urandom(3 * ElbeSoapClient.UPLOAD_CHUNK_SIZE + 123)
+    f = tmp_path / 'upload.bin'
+    f.write_bytes(data)
+
+    with f.open('rb') as fp:
+        chunks = list(ElbeSoapClient._base64_chunks(fp))
+
+    assert len(chunks) == 4
+    for chunk in chunks:
+        assert len(chunk) + _ENVELOPE_SIZE <= max_content_length
+
+    assert b''.join(binascii.a2b_base64(chunk) for chunk in chunks) == data
+
+
+class _ShortResponseHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '100')
+        self.end_headers()
+        self.wfile.write(b'ELBE')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def short_response_url():
+    with http.server.HTTPServer(('127.0.0.1', 0), _ShortResponseHandler) as httpd:
+        thread = threading.Thread(target=httpd.handle_request)
+        thread.start()
+        yield f'http://127.0.0.1:{httpd.server_port}/file'
+        thread.join()
+
+
+def test_download_too_short(short_response_url, tmp_path):
+    with pytest.raises(ContentTooShortError):
+        ElbeSoapClient._download_to(short_response_url, tmp_path / 'file')
@@ -2,19 +2,19 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 # SPDX-FileCopyrightText: 2024 Linutronix GmbH
 
-import itertools
 import os
 
 import pytest
 
-from elbepack.main import run_elbe_subcommand
+from elbepack.validate import validate_xml
+from elbepack.xmlpreprocess import xmlpreprocess
 
 
 def _test_cases():
     return [
         os.path.join('tests', fname)
         for fname
-        in os.listdir('tests')
+        in sorted(os.listdir('tests'))
         if fname.endswith('.xml')
     ]
 
@@ -23,13 +23,18 @@ def _examples():
     return [
         os.path.join('examples', fname)
         for fname
-        in os.listdir('examples')
+        in sorted(os.listdir('examples'))
         if fname.endswith('.xml')
     ]
 
 
-@pytest.mark.parametrize('f', itertools.chain(_test_cases(), _examples()))
+# The cases are independent of each other and only write below tmp_path,
+# so they can be distributed with pytest-xdist ('pytest -n auto').
+@pytest.mark.parametrize('f', [*_test_cases(), *_examples()])
 def test_validate(f, tmp_path):
     p = tmp_path / 'preprocessed.xml'
-    run_elbe_subcommand(['preprocess', '-o', p, f])
-    run_elbe_subcommand(['validate', p])
+    # Call the implementation of 'elbe preprocess' and 'elbe validate'
+    # directly, to skip the argument parsing and to report the actual
+    # validation errors on failure.
+    xmlpreprocess(f, p, sshport=5022, soapport=7587)
+    assert validate_xml(p) == []
@@ -4,6 +4,7 @@
 
 import copy
 import os
+import threading
 
 from lxml.etree import Element, ElementTree, SubElement
 from lxml.etree import Resolver, XMLParser, XMLSchema, fromstring, parse, tostring
@@ -29,12 +30,26 @@ class _ElbepackSchemaResolver(Resolver):
             return self.resolve_file(xml_schema_file('xml.xsd'), context)
 
 
+_schema_cache = threading.local()
+
+
 def dbsfed_schema():
-    parser = XMLParser(no_network=True)
-    parser.resolvers.add(_ElbepackSchemaResolver())
-    with xml_schema_file('dbsfed.xsd') as schema_file:
-        schema_tree = parse(schema_file, parser=parser)
-    return XMLSchema(schema_tree)
+    """
+    Return the compiled dbsfed schema.
+
+    Compiling the schema is expensive, so it is only done once per thread.
+    The instance is not shared between threads, as XMLSchema keeps the
+    error_log of its last validation.
+    """
+    schema = getattr(_schema_cache, 'dbsfed', None)
+    if schema is None:
+        parser = XMLParser(no_network=True)
+        parser.resolvers.add(_ElbepackSchemaResolver())
+        with xml_schema_file('dbsfed.xsd') as schema_file:
+            schema_tree = parse(schema_file, parser=parser)
+        schema = XMLSchema(schema_tree)
+        _schema_cache.dbsfed = schema
+    return schema
 
 
 class eiter: